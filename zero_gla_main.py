@@ -1,4 +1,8 @@
 import os
+# Must be set before the first CUDA allocation. Expandable segments stop the repeated full-model
+# perturbation buffers from fragmenting the caching allocator. They do not work with CUDA IPC, which
+# is fine here because everything runs in one process.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
 import torch
 import argparse
 import time
@@ -11,7 +15,6 @@ from gen_attack import gen_attack_algorithm, Generator
 from torchmetrics.functional import peak_signal_noise_ratio, structural_similarity_index_measure
 from torchmetrics.image.lpip import LearnedPerceptualImagePatchSimilarity
 import random
-os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True"
 random.seed(1234)
 
 def parse_args():
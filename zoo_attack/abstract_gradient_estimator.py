@@ -10,11 +10,14 @@ class AbstractGradientEstimator(ABC):
     torch_dtype: torch.dtype
     parameters_list: list[torch.nn.Parameter]
     sgd_only_no_optim: bool = False
+    _rng: torch.Generator | None = None
 
     def get_rng(self, seed: int, perturb_index: int) -> torch.Generator:
-        return torch.Generator(device=self.device).manual_seed(
-            seed * (perturb_index + 17) + perturb_index
-        )
+        # Reseed one cached generator instead of constructing a new one on every call. Callers
+        # must finish with the returned generator before calling get_rng again.
+        if self._rng is None:
+            self._rng = torch.Generator(device=self.device)
+        return self._rng.manual_seed(seed * (perturb_index + 17) + perturb_index)
 
     def perturb_model(self, perturb: torch.Tensor, alpha: float | int = 1) -> None:
         start = 0
@@ -34,11 +37,11 @@ class AbstractGradientEstimator(ABC):
         num_pert = len(dir_grads)
         for i, dir_grad in enumerate(dir_grads):
             rng = self.get_rng(seed, i)
-            update = self.generate_perturbation_norm(rng).mul_(dir_grad / num_pert)
+            pb_norm = self.generate_perturbation_norm(rng)
             if update_grad is None:
-                update_grad = update
+                update_grad = pb_norm.mul_(dir_grad / num_pert)
             else:
-                update_grad += update
+                update_grad.addcmul_(pb_norm, dir_grad / num_pert)
         assert update_grad is not None
         self.put_grad(update_grad)
 
@@ -2,10 +2,15 @@ from enum import Enum
 from typing import Callable, Iterator, Sequence
 
 import torch
+from torch.func import functional_call
 from torch.nn import Parameter
 from .abstract_gradient_estimator import AbstractGradientEstimator
 
 
+# Columns per upcast GEMV block when perturb_dtype differs from torch_dtype.
+_AVERAGE_BLOCK_SIZE = 1 << 22
+
+
 class RandomGradEstimateMethod(Enum):
     rge_central = "rge-central"
     rge_forward = "rge-forward"
@@ -24,15 +29,28 @@ class RandomGradientEstimator(AbstractGradientEstimator):
         torch_dtype: torch.dtype = torch.float32,
         paramwise_perturb: bool = False,
         sgd_only_no_optim: bool = False,
+        perturb_dtype: torch.dtype | None = None,
+        compile_perturbation: bool = False,
+        host_rng: bool = False,
     ):
         self.parameters_list: list[Parameter] = [p for p in parameters if p.requires_grad]
         self.total_dimensions = sum([p.numel() for p in self.parameters_list])
+        self._numels: list[int] = [p.numel() for p in self.parameters_list]
+        self._shapes: list[torch.Size] = [p.shape for p in self.parameters_list]
+        # Each parameter owns its grad storage; `put_grad` copies into these buffers. Allocated on
+        # first use, since an estimator that only generates perturbations never needs them.
+        self._grad_buffers: list[torch.Tensor] | None = None
+        self._grad_buf: torch.Tensor | None = None
+        self._pert_row_buf: torch.Tensor | None = None
         print(f"trainable model size: {self.total_dimensions}")
 
         self.mu = mu
         self.num_pert = num_pert
         self.device = device
         self.torch_dtype = torch_dtype
+        # dtype of the flat perturbation vectors. A 16-bit dtype (e.g. torch.bfloat16) halves the
+        # RNG and memory traffic of the perturbation path; grads are still returned in torch_dtype.
+        self.perturb_dtype = perturb_dtype if perturb_dtype is not None else torch_dtype
         if isinstance(grad_estimate_method, RandomGradEstimateMethod):
             self.grad_estimate_method: RandomGradEstimateMethod = grad_estimate_method
         else:
@@ -43,60 +61,163 @@ class RandomGradientEstimator(AbstractGradientEstimator):
             else:
                 raise Exception("Grad estimate method has to be rge-central or rge-forward")
         self.paramwise_perturb = paramwise_perturb
+        # Persistent perturbation buffers, refilled in place every step.
         if paramwise_perturb:
             assert normalize_perturbation is False
+            self._scratch: list[torch.Tensor] = [
+                torch.empty_like(p, dtype=self.torch_dtype) for p in self.parameters_list
+            ]
+        else:
+            self._pert_buf = torch.empty(
+                num_pert, self.total_dimensions, device=device, dtype=self.perturb_dtype
+            )
+
+        # Draw flat perturbations on the CPU into pinned memory and copy them asynchronously.
+        self.host_rng = host_rng
+        if host_rng:
+            assert not paramwise_perturb, "host_rng only supports the flat perturbation path."
+            assert device is not None and torch.device(device).type == "cuda", (
+                "host_rng needs a CUDA device."
+            )
+            self._host_pert_buf = torch.empty(
+                num_pert, self.total_dimensions, dtype=self.perturb_dtype, pin_memory=True
+            )
+            self._host_copy_done: torch.cuda.Event | None = None
 
         self.sgd_only_no_optim = sgd_only_no_optim
         if sgd_only_no_optim:
             assert self.paramwise_perturb
 
         self.normalize_perturbation = normalize_perturbation
-
-    def get_rng(self, seed: int, perturb_index: int) -> torch.Generator:
-        return torch.Generator(device=self.device).manual_seed(
-            seed * (perturb_index + 17) + perturb_index
-        )
+        self._rng = torch.Generator(device="cpu" if host_rng else self.device)
+
+        self._one_perturbation_fn = self._one_perturbation
+        if compile_perturbation:
+            # Inductor kernel fusion only: the step mutates the parameters in place, which rules
+            # out CUDA graphs, and Python hooks in `loss_fn` (e.g. BNStatisticsHook) cause graph
+            # breaks. Dynamo guards on `loss_fn`, so pass the same callable every step.
+            self._one_perturbation_fn = torch.compile(
+                self._one_perturbation, fullgraph=False, dynamic=False
+            )
 
     def generate_perturbation_norm(self, rng: torch.Generator | None = None) -> torch.Tensor:
+        rng_device = rng.device if rng is not None else self.device
         p = torch.randn(
-            self.total_dimensions, device=self.device, dtype=self.torch_dtype, generator=rng
-        )
+            self.total_dimensions, device=rng_device, dtype=self.perturb_dtype, generator=rng
+        ).to(self.device)
 
         if self.normalize_perturbation:
-            p.div_(torch.norm(p))
+            p.mul_(torch.linalg.vector_norm(p).clamp_min_(1e-12).reciprocal_())
 
         return p
 
+    def generate_perturbations_norm(self, rng: torch.Generator | None = None) -> torch.Tensor:
+        """Generate all `num_pert` perturbations in one call, shape [num_pert, total_dimensions].
+
+        Every row is drawn from the same generator stream, so a whole batch of perturbations is
+        reproduced from one seed (see `get_rng(seed, 0)`). The result is a persistent buffer that
+        the next call overwrites.
+        """
+        rng_device = rng.device if rng is not None else self._rng.device
+        if rng_device.type == self._pert_buf.device.type:
+            z = self._pert_buf.normal_(generator=rng)
+        else:
+            assert self.host_rng, (
+                f"A generator on {rng_device} cannot fill perturbations on "
+                f"{self._pert_buf.device}; use get_rng() or host_rng=True."
+            )
+            if self._host_copy_done is not None:
+                # The pinned buffer may still be read by the previous async copy.
+                self._host_copy_done.synchronize()
+            self._host_pert_buf.normal_(generator=rng)
+            z = self._pert_buf.copy_(self._host_pert_buf, non_blocking=True)
+            self._host_copy_done = torch.cuda.Event()
+            self._host_copy_done.record()
+
+        if self.normalize_perturbation:
+            # One reduction pass plus one in-place scale; the norm stays a device tensor.
+            z.mul_(torch.linalg.vector_norm(z, dim=1, keepdim=True).clamp_min_(1e-12).reciprocal_())
+
+        return z
+
+    def _average_perturbations(self, dir_grads: torch.Tensor, pb_norms: torch.Tensor) -> torch.Tensor:
+        # g_full = Z^T @ [g_1, ..., g_p] / p, written into `_grad_buf`. The 1/p is folded into the
+        # num_pert-long vector so there is no extra pass over g_full.
+        if self._grad_buf is None:
+            self._grad_buf = torch.empty(
+                self.total_dimensions, device=self.device, dtype=self.torch_dtype
+            )
+        scales = (dir_grads / len(dir_grads)).to(self._grad_buf.dtype)
+        if pb_norms.dtype == self._grad_buf.dtype:
+            return torch.mv(pb_norms.t(), scales, out=self._grad_buf)
+        # Lower-precision perturbations: upcast one column block at a time and GEMV it into the
+        # matching slice of `_grad_buf`, so nothing is rounded to the perturbation dtype.
+        for start in range(0, self.total_dimensions, _AVERAGE_BLOCK_SIZE):
+            blk = slice(start, start + _AVERAGE_BLOCK_SIZE)
+            torch.mv(
+                pb_norms[:, blk].t().to(self._grad_buf.dtype), scales, out=self._grad_buf[blk]
+            )
+        return self._grad_buf
+
+    def _as_weight_dtype(self, pb_norm: torch.Tensor) -> torch.Tensor:
+        # Upcast a 16-bit perturbation row once, so the applies that follow stay fused foreach
+        # kernels instead of falling back to one add_ per parameter.
+        if pb_norm.dtype == self.torch_dtype:
+            return pb_norm
+        if self._pert_row_buf is None:
+            self._pert_row_buf = torch.empty(
+                self.total_dimensions, device=self.device, dtype=self.torch_dtype
+            )
+        return self._pert_row_buf.copy_(pb_norm)
+
+    def _split_flat(self, flat: torch.Tensor) -> list[torch.Tensor]:
+        # Per-parameter views into a flat vector, sliced in C++ rather than a Python offset loop.
+        chunks = torch.split_with_sizes(flat, self._numels)
+        return [chunk.view(shape) for chunk, shape in zip(chunks, self._shapes)]
+
     # TODO(zidong) this function should not have perturb=None usage.
     def perturb_model(self, perturb: torch.Tensor | None = None, alpha: float | int = 1) -> None:
-        start = 0
-        for p in self.parameters_list:
-            if perturb is not None:
-                _perturb = perturb[start : (start + p.numel())]
-                p.data = p.data + alpha * _perturb.view(p.shape)
-            else:
+        with torch.no_grad():
+            if perturb is None:
                 if alpha != 1:
-                    p.mul_(alpha)
-            start += p.numel()
+                    torch._foreach_mul_(self.parameters_list, alpha)
+                return
+            views = self._split_flat(perturb)
+            # One multi-tensor kernel instead of one add per parameter. `perturb` must be in the
+            # weights' dtype for that; otherwise foreach falls back to one add_ per tensor.
+            torch._foreach_add_(self.parameters_list, views, alpha=alpha)
+
+    def _perturb_model_out_of_place(self, perturb: torch.Tensor, alpha: float | int = 1) -> None:
+        # Rebinds p.data instead of updating in place, so losses whose autograd graph is still
+        # alive keep the weights they were computed with.
+        for p, _perturb in zip(self.parameters_list, self._split_flat(perturb)):
+            p.data = p.data + alpha * _perturb
 
     def put_grad(self, grad: torch.Tensor) -> None:
-        start = 0
-        for p in self.parameters_list:
-            p.grad = grad[start : (start + p.numel())].view(p.shape)
-            start += p.numel()
+        # Copy instead of handing out views of `grad`, so the params do not share one backing
+        # tensor and the foreach optimizer kernels see separate, contiguous grads.
+        torch._foreach_copy_(self._get_grad_buffers(), self._split_flat(grad))
+        self._attach_grad_buffers()
+
+    def _get_grad_buffers(self) -> list[torch.Tensor]:
+        if self._grad_buffers is None:
+            self._grad_buffers = [torch.empty_like(p) for p in self.parameters_list]
+        return self._grad_buffers
+
+    def _attach_grad_buffers(self) -> None:
+        for p, buf in zip(self.parameters_list, self._get_grad_buffers()):
+            p.grad = buf  # Re-attached every time since zero_grad() may have set it to None.
 
     def generate_then_put_grad(self, seed: int, dir_grads: torch.Tensor) -> None:
-        update_grad: torch.Tensor | None = None
+        """Regenerate the perturbations of `seed` and put avg_p(dir_grad_p * z_p) as the grad.
+
+        `seed` indexes a single generator stream: the generator is seeded once and all
+        perturbations are regenerated with one randn call, so `dir_grads[i]` pairs with row i.
+        """
         num_pert = len(dir_grads)
-        for i, dir_grad in enumerate(dir_grads):
-            rng = self.get_rng(seed, i)
-            update = self.generate_perturbation_norm(rng).mul_(dir_grad / num_pert)
-            if update_grad is None:
-                update_grad = update
-            else:
-                update_grad += update
-        assert update_grad is not None
-        self.put_grad(update_grad)
+        assert num_pert == self.num_pert
+        pb_norms = self.generate_perturbations_norm(self.get_rng(seed, 0))
+        self.put_grad(self._average_perturbations(dir_grads, pb_norms))
 
     def compute_grad_with_graph(
         self,
@@ -121,24 +242,22 @@ class RandomGradientEstimator(AbstractGradientEstimator):
         if self.grad_estimate_method == RandomGradEstimateMethod.rge_forward:
             pert_minus_loss = loss_fn(batch_inputs, labels)
 
-        for i in range(self.num_pert):
-            rng = self.get_rng(seed, i)
-            pb_norm = self.generate_perturbation_norm(rng)
-
-            self.perturb_model(pb_norm, alpha=self.mu)
+        pb_norms = self.generate_perturbations_norm(self.get_rng(seed, 0))
+        for pb_norm in pb_norms:
+            self._perturb_model_out_of_place(pb_norm, alpha=self.mu)
             pert_plus_loss = loss_fn(batch_inputs, labels)
 
             if self.grad_estimate_method == RandomGradEstimateMethod.rge_central:
-                self.perturb_model(pb_norm, alpha=-2 * self.mu)
+                self._perturb_model_out_of_place(pb_norm, alpha=-2 * self.mu)
                 pert_minus_loss = loss_fn(batch_inputs, labels)
-                self.perturb_model(pb_norm, alpha=self.mu)
+                self._perturb_model_out_of_place(pb_norm, alpha=self.mu)
             elif self.grad_estimate_method == RandomGradEstimateMethod.rge_forward:
-                self.perturb_model(pb_norm, alpha=-self.mu)
+                self._perturb_model_out_of_place(pb_norm, alpha=-self.mu)
 
             dir_grad = (pert_plus_loss - pert_minus_loss) / (self.mu * denominator)
             dir_grads.append(dir_grad)
 
-        return torch.stack(dir_grads).to(batch_inputs.device)
+        return torch.stack(dir_grads)
 
     
     def compute_grad(self, batch_inputs, labels, loss_fn, seed: int, is_put: bool = True) -> torch.Tensor:
@@ -158,17 +277,70 @@ class RandomGradientEstimator(AbstractGradientEstimator):
 
         return perturbation_dir_grads
 
+    def compute_grad_vmap(
+        self,
+        model: torch.nn.Module,
+        batch_inputs: torch.Tensor,
+        labels: torch.Tensor,
+        criterion: Callable[[torch.Tensor, torch.Tensor], torch.Tensor],
+        seed: int,
+        is_put: bool = True,
+    ) -> torch.Tensor:
+        """
+        Same estimate as `compute_grad`, but every perturbed loss is evaluated in one batched
+        forward: `model` is run with `torch.func.functional_call` under `torch.vmap` over a
+        stacked parameter dimension of size num_pert (2 * num_pert for rge-central).
+
+        Extra parameter memory is about 3 * num_pert * D for rge-central (2 * num_pert * D for
+        rge-forward), D being the trainable size. Activation memory scales with the stacked size
+        times the batch, i.e. like a forward on a batch 2 * num_pert times larger for rge-central,
+        and usually dominates for convolutional models. The model must be vmap-compatible
+        (e.g. BatchNorm in eval mode, no hooks that store activations).
+
+        Returns:
+            Tensor of shape [num_pert] containing scalar gradient estimates.
+        """
+        assert not self.paramwise_perturb, "Paramwise mode not supported here."
+        param_names = {id(p): name for name, p in model.named_parameters()}
+        names = [param_names[id(p)] for p in self.parameters_list]
+        central = self.grad_estimate_method == RandomGradEstimateMethod.rge_central
+
+        with torch.no_grad():
+            pb_norms = self.generate_perturbations_norm(self.get_rng(seed, 0))
+            # Built one parameter at a time, so only the stacked result is full-size.
+            stacked_params = {}
+            for name, p, z in zip(
+                names, self.parameters_list, torch.split(pb_norms, self._numels, dim=1)
+            ):
+                if central:
+                    z = torch.cat([z, -z])
+                stacked = (z.to(p.dtype) * self.mu).add_(p.reshape(-1))
+                stacked_params[name] = stacked.reshape(-1, *p.shape)
+
+            def perturbed_loss(params: dict[str, torch.Tensor]) -> torch.Tensor:
+                return criterion(functional_call(model, params, (batch_inputs,)), labels)
+
+            losses = torch.vmap(perturbed_loss)(stacked_params)
+            if central:
+                dir_grads = (losses[: self.num_pert] - losses[self.num_pert :]) / (2 * self.mu)
+            else:
+                dir_grads = (losses - criterion(model(batch_inputs), labels)) / self.mu
+            dir_grads = dir_grads.to(self.torch_dtype)
+
+            if is_put:
+                self.put_grad(self._average_perturbations(dir_grads, pb_norms))
+        return dir_grads
+
     def sgd_no_optim_update_model(
         self, perturbation_dir_grads: torch.Tensor, seed: int, lr: float
     ) -> None:
-        num_pert = len(perturbation_dir_grads)
-        for i, dir_grad in enumerate(perturbation_dir_grads):
-            rng = self.get_rng(seed, i)
-            for param in self.parameters_list:
-                _perturb = torch.randn(
-                    *param.shape, device=self.device, dtype=self.torch_dtype, generator=rng
-                )
-                param.data.add_(_perturb, alpha=-lr * float(dir_grad) / num_pert)
+        scales = (-lr / len(perturbation_dir_grads)) * perturbation_dir_grads
+        with torch.no_grad():
+            for i, scale in enumerate(scales):
+                perturb = self._fill_perturb(self.get_rng(seed, i))
+                # 0-D device scale; `alpha=` would need a float() sync.
+                torch._foreach_mul_(perturb, scale)
+                torch._foreach_add_(self.parameters_list, perturb)
 
     def _zo_grad_estimate(
         self,
@@ -188,61 +360,62 @@ class RandomGradientEstimator(AbstractGradientEstimator):
         i.e., returning (g_full, [g_1, g_2, ..., g_p]).
         """
         with torch.no_grad():
-            grad: torch.Tensor | None = None
-            dir_grads = []
-            denominator_factor = (
-                2 if self.grad_estimate_method == RandomGradEstimateMethod.rge_central else 1
-            )
+            dir_grads = torch.empty(self.num_pert, device=self.device, dtype=self.torch_dtype)
+            pert_minus_loss = None
             if self.grad_estimate_method == RandomGradEstimateMethod.rge_forward:
                 pert_minus_loss = loss_fn(batch_inputs, labels)
 
-            for i in range(self.num_pert):
-                rng = self.get_rng(seed, i)
-                pb_norm = self.generate_perturbation_norm(rng)
-
-                self.perturb_model(pb_norm, alpha=self.mu)
-                pert_plus_loss = loss_fn(batch_inputs, labels)
-                if self.grad_estimate_method == RandomGradEstimateMethod.rge_central:
-                    self.perturb_model(pb_norm, alpha=-2 * self.mu)
-                    pert_minus_loss = loss_fn(batch_inputs, labels)
-                    self.perturb_model(pb_norm, alpha=self.mu)  # Restore model
-                elif self.grad_estimate_method == RandomGradEstimateMethod.rge_forward:
-                    self.perturb_model(pb_norm, alpha=-self.mu)  # Restore model
-
-                dir_grad = (pert_plus_loss - pert_minus_loss) / (self.mu * denominator_factor)
-                dir_grads += [dir_grad]
-                if grad is None:
-                    grad = pb_norm * dir_grad
-                else:
-                    grad = grad + pb_norm * dir_grad
+            # All perturbations come from a single randn call on one generator stream.
+            pb_norms = self.generate_perturbations_norm(self.get_rng(seed, 0))
+            for i, pb_norm in enumerate(pb_norms):
+                # 0-D device assignment, no host round trip.
+                dir_grads[i] = self._one_perturbation_fn(
+                    self._as_weight_dtype(pb_norm), batch_inputs, labels, loss_fn, pert_minus_loss
+                )
 
+            grad = self._average_perturbations(dir_grads, pb_norms)
+            return grad, dir_grads
 
-                del pb_norm
+    def _one_perturbation(
+        self,
+        pb_norm: torch.Tensor,
+        batch_inputs: torch.Tensor,
+        labels: torch.Tensor,
+        loss_fn: Callable[[torch.Tensor, torch.Tensor], torch.Tensor],
+        base_loss: torch.Tensor | None,
+    ) -> torch.Tensor:
+        """Directional gradient along `pb_norm`; the model is restored before returning.
 
-            assert grad is not None
-            return grad.div_(self.num_pert), torch.tensor(dir_grads, device=self.device)
+        `base_loss` is the unperturbed loss for rge-forward and ignored for rge-central.
+        """
+        self.perturb_model(pb_norm, alpha=self.mu)
+        pert_plus_loss = loss_fn(batch_inputs, labels)
+        if self.grad_estimate_method == RandomGradEstimateMethod.rge_central:
+            self.perturb_model(pb_norm, alpha=-2 * self.mu)
+            pert_minus_loss = loss_fn(batch_inputs, labels)
+            self.perturb_model(pb_norm, alpha=self.mu)  # Restore model
+            return (pert_plus_loss - pert_minus_loss) / (2 * self.mu)
+        self.perturb_model(pb_norm, alpha=-self.mu)  # Restore model
+        assert base_loss is not None
+        return (pert_plus_loss - base_loss) / self.mu
 
     def generate_then_put_grad_paramwise(self, seed: int, dir_grads: torch.Tensor) -> None:
-        num_pert = len(dir_grads)
-        for i, dir_grad in enumerate(dir_grads):
-            rng = self.get_rng(seed, i)
-            for param in self.parameters_list:
-                _perturb = torch.randn(
-                    *param.shape, device=self.device, dtype=self.torch_dtype, generator=rng
-                )
-                if i == 0:
-                    param.grad = _perturb.mul_(dir_grad / num_pert)
-                else:
-                    param.grad += _perturb.mul_(dir_grad / num_pert)
-                del _perturb
+        scales = dir_grads / len(dir_grads)
+        grad_buffers = self._get_grad_buffers()
+        torch._foreach_zero_(grad_buffers)
+        for i, scale in enumerate(scales):
+            perturb = self._fill_perturb(self.get_rng(seed, i))
+            torch._foreach_mul_(perturb, scale)
+            torch._foreach_add_(grad_buffers, perturb)
+        self._attach_grad_buffers()
+
+    def _fill_perturb(self, rng: torch.Generator) -> list[torch.Tensor]:
+        for s in self._scratch:
+            s.normal_(generator=rng)
+        return self._scratch
 
     def perturb_model_paramwise(self, rng: torch.Generator, alpha: float | int) -> None:
-        for param in self.parameters_list:
-            _perturb = torch.randn(
-                *param.shape, device=self.device, dtype=self.torch_dtype, generator=rng
-            )
-            param.add_(_perturb, alpha=alpha)
-            del _perturb
+        torch._foreach_add_(self.parameters_list, self._fill_perturb(rng), alpha=alpha)
 
     def _zo_grad_estimate_paramwise(
         self,
@@ -251,7 +424,7 @@ class RandomGradientEstimator(AbstractGradientEstimator):
         loss_fn: Callable[[torch.Tensor, torch.Tensor], torch.Tensor],
         seed: int,
     ) -> torch.Tensor:
-        dir_grads = []
+        dir_grads = torch.empty(self.num_pert, device=self.device, dtype=self.torch_dtype)
         denominator_factor = (
             2 if self.grad_estimate_method == RandomGradEstimateMethod.rge_central else 1
         )
@@ -259,21 +432,19 @@ class RandomGradientEstimator(AbstractGradientEstimator):
             pert_minus_loss = loss_fn(batch_inputs, labels)
 
         for i in range(self.num_pert):
-            rng = self.get_rng(seed, i)
-            self.perturb_model_paramwise(rng, alpha=self.mu)
+            # Generate once and reuse the same buffers for the plus, minus and restore steps.
+            perturb = self._fill_perturb(self.get_rng(seed, i))
+            torch._foreach_add_(self.parameters_list, perturb, alpha=self.mu)
             pert_plus_loss = loss_fn(batch_inputs, labels)
             if self.grad_estimate_method == RandomGradEstimateMethod.rge_central:
-                rng = self.get_rng(seed, i)
-                self.perturb_model_paramwise(rng, alpha=-2 * self.mu)
+                torch._foreach_add_(self.parameters_list, perturb, alpha=-2 * self.mu)
                 pert_minus_loss = loss_fn(batch_inputs, labels)
-                rng = self.get_rng(seed, i)
-                self.perturb_model_paramwise(rng, alpha=self.mu)  # Restore model
+                torch._foreach_add_(self.parameters_list, perturb, alpha=self.mu)  # Restore model
             elif self.grad_estimate_method == RandomGradEstimateMethod.rge_forward:
-                rng = self.get_rng(seed, i)
-                self.perturb_model_paramwise(rng, alpha=-self.mu)  # Restore model
+                torch._foreach_add_(self.parameters_list, perturb, alpha=-self.mu)  # Restore model
             dir_grad = (pert_plus_loss - pert_minus_loss) / (self.mu * denominator_factor)
-            dir_grads += [dir_grad]
-        return torch.tensor(dir_grads, device=self.device)
+            dir_grads[i] = dir_grad.detach()
+        return dir_grads
 
     def update_gradient_estimator_given_seed_and_grad(
         self,
@@ -324,6 +495,7 @@ class RandomGradientEstimator(AbstractGradientEstimator):
             raise Exception("Revert only supports SGD without momentum")
 
         lr, weight_decay = optimizer.defaults["lr"], optimizer.defaults["weight_decay"]
+        wd_scale = 1 / (1 - lr * weight_decay)
         for one_update_seed, one_update_grad_dirs in zip(iteration_seeds, iteration_grad_scalar):
             # We don't really need optimizer.zero_grad() here because we put grad directly.
             if self.paramwise_perturb:
@@ -331,8 +503,10 @@ class RandomGradientEstimator(AbstractGradientEstimator):
             else:
                 self.generate_then_put_grad(one_update_seed, one_update_grad_dirs)
 
-            for param in self.parameters_list:
-                assert param.grad is not None
-                param.add_(param.grad, alpha=lr)  # gradient ascent instead of descent.
+            grads = [param.grad for param in self.parameters_list]
+            assert all(grad is not None for grad in grads)
+            with torch.no_grad():
+                # gradient ascent instead of descent.
+                torch._foreach_add_(self.parameters_list, grads, alpha=lr)
                 if weight_decay > 0:
-                    param.mul_(1 / (1 - lr * weight_decay))
+                    torch._foreach_mul_(self.parameters_list, wd_scale)
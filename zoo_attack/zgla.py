@@ -48,13 +48,8 @@ def zgla_algorithm(grad, y, mean_var_list, model, input_size, max_iteration,
         dummy_loss = criterion(model(dummy_x), y)
         generated_grad = torch.autograd.grad(dummy_loss, model.parameters(), create_graph=True)
         gen_grad_flat = torch.cat([g.view(-1) for g in generated_grad])
-        dummy_grad = []
-        for i in range(num_pert):
-            rng = zo_estimator.get_rng(seed, i)
-            pb_norm = zo_estimator.generate_perturbation_norm(rng)
-            
-            dot_value = torch.dot(gen_grad_flat, pb_norm)
-            dummy_grad += [dot_value]
+        pb_norms = zo_estimator.generate_perturbations_norm(zo_estimator.get_rng(seed, 0))
+        dummy_grad = pb_norms @ gen_grad_flat
 
         dummy_mean_var_list = hook.mean_var_list
         grad_loss = 0